@@ -1,14 +1,149 @@
 import pandas as pd
+import codecs
+import csv
 import io
-import json
 import os
-from typing import Dict, List, Tuple
-from thefuzz import fuzz
+import re
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from rapidfuzz import fuzz, process
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import python_calamine  # noqa: F401 - Rust-backed engine for pd.read_excel
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+try:
+    import chardet
+    CHARDET_AVAILABLE = True
+except ImportError:
+    CHARDET_AVAILABLE = False
+
+# Upper bound on cached (patterns, column) score rows kept per parser
+SIM_CACHE_SIZE = 4096
+# fuzz.ratio is the normalised Indel similarity on a 0-100 scale, which rapidfuzz
+# scores with the bit-parallel kernel for strings up to 64 chars (every header
+# pattern); uint8 results need that scale, so the 0-1 Indel scorer is not used
+SCORER = fuzz.ratio
+# Similarities below this are noise between unrelated headers and count as 0
+SCORE_CUTOFF = 40
+# Representations parse_file can hand back as processed_data
+OUTPUT_FORMATS = ("records", "arrow", "json")
+# Leading bytes inspected before choosing a CSV delimiter and parser
+SNIFF_BYTES = 2048
+# Leading bytes handed to chardet when a CSV is not UTF-8
+ENCODING_SAMPLE_BYTES = 65536
+# chardet guesses at or below this confidence are ignored, as in EnhancedExcelParser
+ENCODING_MIN_CONFIDENCE = 0.7
+# Code page assumed for non-UTF-8 CSVs chardet can't identify; every byte decodes
+# or is replaced, so a wrong guess costs a few characters instead of whole words
+FALLBACK_ENCODING = "cp1252"
+
+@lru_cache(maxsize=8)
+def _pattern_self_scores(patterns: Tuple[str, ...]) -> Dict[str, np.ndarray]:
+    """Score rows for headers that exactly equal a pattern, computed once per pattern set"""
+    matrix = process.cdist(
+        patterns, patterns, scorer=SCORER, dtype=np.uint8, score_cutoff=SCORE_CUTOFF
+    )
+    return dict(zip(patterns, matrix))
+
+def _phrase_regex(phrases: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """One alternation for all phrases; the lookahead also reports overlapping hits"""
+    if not phrases:
+        return None
+    return re.compile("(?=(" + "|".join(map(re.escape, phrases)) + "))")
+
+def _pattern_membership(patterns: Dict[str, Tuple[str, ...]], tokens: Tuple[str, ...]) -> np.ndarray:
+    """Read-only (types x tokens) mask of which tokens belong to each data type"""
+    mask = np.array([[token in fields for token in tokens] for fields in patterns.values()], dtype=bool)
+    mask.setflags(write=False)
+    return mask
+
+class RecordView(Sequence):
+    """Read-only list-of-dicts view over a DataFrame; rows become dicts only when read"""
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        self._columns = list(df.columns)
+
+    def __len__(self) -> int:
+        return len(self._df)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        row = next(self._df.iloc[index:index + 1].itertuples(index=False, name=None))
+        return dict(zip(self._columns, row))
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in self._df.itertuples(index=False, name=None):
+            yield dict(zip(self._columns, row))
+
+    def __repr__(self) -> str:
+        return f"RecordView({len(self)} records)"
+
+    def to_frame(self) -> pd.DataFrame:
+        """Underlying DataFrame, for callers that can work column-wise"""
+        return self._df
 
 class AIExcelParser:
-    def __init__(self):
+    # POS system patterns (simplified example); single-word patterns are exact
+    # header lookups, multi-word ones may also sit inside a longer header
+    POS_PATTERNS: Dict[str, Tuple[str, ...]] = {
+        "square": ("gross sales", "net sales", "tax", "tip", "fees", "item name"),
+        "toast": ("item", "quantity", "gross", "discount", "net"),
+        "clover": ("name", "price", "amount", "tax"),
+    }
+    _POS_PATTERN_SETS: Dict[str, Tuple[frozenset, Optional[re.Pattern], int]] = {
+        system: (
+            frozenset(p for p in patterns if " " not in p),
+            _phrase_regex(tuple(p for p in patterns if " " in p)),
+            len(patterns),
+        )
+        for system, patterns in POS_PATTERNS.items()
+    }
+
+    # Data type assignment
+    DATA_TYPE_PATTERNS: Dict[str, Tuple[str, ...]] = {
+        "sales": ("item", "quantity", "price", "total"),
+        "inventory": ("item", "stock", "quantity"),
+        "accounting": ("vendor", "invoice", "total"),
+    }
+    _DATA_TYPE_NAMES: Tuple[str, ...] = tuple(DATA_TYPE_PATTERNS)
+    _ALL_DATA_TYPE_TOKENS: Tuple[str, ...] = tuple(
+        sorted({p for fields in DATA_TYPE_PATTERNS.values() for p in fields})
+    )
+    _DATA_TYPE_MEMBERSHIP = _pattern_membership(DATA_TYPE_PATTERNS, _ALL_DATA_TYPE_TOKENS)
+    _DATA_TYPE_SIZES = _DATA_TYPE_MEMBERSHIP.sum(axis=1) * 100
+
+    def __init__(self, use_polars: bool = False):
+        # Opt-in Rust reader for the load step; pandas stays the default and fallback
+        self.use_polars = use_polars and POLARS_AVAILABLE
         self.openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
         self.ai_client_initialized = False
+        # POS exports repeat the same headers, so fuzzy scores are kept across files
+        self._sim_cache: Dict[Tuple[Tuple[str, ...], str], np.ndarray] = {}
+        self._detect_schema = lru_cache(maxsize=128)(self._detect_schema)
         if self.openrouter_api_key:
             self.initialize_ai_client()
 
@@ -17,22 +152,39 @@ class AIExcelParser:
         self.ai_client_initialized = True
         print("Mock OpenRouter AI client initialized")
 
-    def parse_file(self, file_contents: bytes, filename: str) -> Dict:
+    def parse_file(
+        self,
+        file_contents: bytes,
+        filename: str,
+        chunksize: Optional[int] = None,
+        format: str = "records",
+    ) -> Dict:
         try:
-            # Optimized parsing using native Pandas capabilities
-            df = self._load_file(file_contents, filename)
+            if format not in OUTPUT_FORMATS:
+                raise ValueError(f"Unsupported output format: {format}")
+            if chunksize and filename.endswith((".csv", ".txt")):
+                if format != "records":
+                    raise ValueError("Streaming mode only supports the records format")
+                # Streaming mode: detect from the header row alone and parse the
+                # body lazily, so peak memory is one chunk rather than the file
+                df = self._peek_headers(file_contents)
+                processed_data = self._iter_records(file_contents, chunksize)
+                # Unknown until the body has been consumed
+                rows_processed = None
+            else:
+                # Optimized parsing using native Pandas capabilities
+                df = self._load_file(file_contents, filename)
+                processed_data = self._format_output(df, format)
+                rows_processed = len(df)
 
             # File analysis through pattern detection
             file_analysis = self._smart_pattern_detection(df, filename)
 
-            # Post-processing with native Python
-            processed_data = df.to_dict(orient="records")
-
             return {
                 "success": True,
                 "data_type": file_analysis["data_type"],
                 "columns_mapped": file_analysis["column_mapping"],
-                "rows_processed": len(processed_data),
+                "rows_processed": rows_processed,
                 "processed_data": processed_data,
                 "ai_confidence": file_analysis.get("confidence", 0.85),
                 "suggestions": file_analysis.get("suggestions", []),
@@ -49,9 +201,9 @@ class AIExcelParser:
         # Native parser with auto-detect + repaired CSV handling
         try:
             if filename.endswith((".csv", ".txt")):
-                df = pd.read_csv(io.BytesIO(file_contents))
+                df = self._read_csv(file_contents)
             elif filename.endswith((".xls", ".xlsx")):
-                df = pd.read_excel(io.BytesIO(file_contents))
+                df = self._read_excel(file_contents)
             else:
                 raise ValueError("Unsupported file type")
 
@@ -60,68 +212,210 @@ class AIExcelParser:
 
         except pd.errors.EmptyDataError:
             raise Exception("Empty file detected")
-        except Exception as e:
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
             if filename.endswith((".csv", ".txt")):
-                # Repair corrupted CSV files (replace bad chars)
+                # Repair corrupted CSV files (replace bad chars); the parser
+                # substitutes while decoding, so no text copy of the file is made
+                delimiter, encoding = self._sniff_csv(file_contents)
                 try:
-                    cleaned_data = file_contents.decode("utf-8", "ignore")
-                    df = pd.read_csv(io.StringIO(cleaned_data))
+                    df = pd.read_csv(
+                        io.BytesIO(file_contents),
+                        sep=delimiter,
+                        encoding=encoding,
+                        encoding_errors="replace",
+                    )
                     return self._clean_dataframe(df)
-                except:
+                except pd.errors.ParserError:
                     pass
 
             raise Exception(f"Failed reading {filename}: {e}")
 
+    @staticmethod
+    def _sniff_csv(file_contents: bytes) -> Tuple[str, Optional[str]]:
+        """Delimiter and encoding from samples of the leading bytes
+
+        The encoding is None when the sample is valid UTF-8. Otherwise it is the
+        code page chardet detects with confidence above ENCODING_MIN_CONFIDENCE,
+        or FALLBACK_ENCODING (read with replacement) when it can't.
+        """
+        encoding = None
+        # A multi-byte character cut off by the sample boundary is not an error
+        sample = file_contents[:SNIFF_BYTES].decode("utf-8", "replace")
+        if "\ufffd" in sample.rstrip("\ufffd"):
+            encoding = FALLBACK_ENCODING
+            if CHARDET_AVAILABLE:
+                result = chardet.detect(file_contents[:ENCODING_SAMPLE_BYTES])
+                if result["encoding"] and result["confidence"] > ENCODING_MIN_CONFIDENCE:
+                    try:
+                        codecs.lookup(result["encoding"])
+                        encoding = result["encoding"]
+                    except LookupError:
+                        # A name Python has no codec for
+                        pass
+            sample = file_contents[:SNIFF_BYTES].decode(encoding, "replace")
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except csv.Error:
+            delimiter = ","
+        return delimiter, encoding
+
+    def _read_csv(self, file_contents: bytes) -> pd.DataFrame:
+        """Parse CSV bytes with pyarrow's multithreaded reader, falling back to the C parser"""
+        # Choose the delimiter and parser up front instead of failing into a retry
+        delimiter, encoding = self._sniff_csv(file_contents)
+        if encoding is not None:
+            # Legacy code pages are decoded by the C parser; stray bytes are replaced
+            return pd.read_csv(
+                io.BytesIO(file_contents), sep=delimiter, encoding=encoding, encoding_errors="replace"
+            )
+        if self.use_polars:
+            try:
+                return self._polars_to_pandas(pl.read_csv(file_contents, separator=delimiter))
+            except pl.exceptions.PolarsError:
+                pass
+        if PYARROW_AVAILABLE:
+            try:
+                table = self._arrow_read_csv(file_contents, delimiter)
+                # pyarrow infers ISO dates and times, and casting them back
+                # reformats the text; re-read them as strings like the C parser keeps them
+                temporal = {field.name: pa.string() for field in table.schema if pa.types.is_temporal(field.type)}
+                if temporal:
+                    table = self._arrow_read_csv(file_contents, delimiter, temporal)
+                # Duplicate headers (de-duplicated by pandas) and non-UTF-8 text
+                # (inferred as binary by pyarrow) are left to the C parser
+                if len(set(table.column_names)) == table.num_columns and not any(
+                    pa.types.is_binary(field.type) for field in table.schema
+                ):
+                    return table.to_pandas()
+            except pa.ArrowInvalid:
+                # Ragged rows, bad encodings and odd dialects go to the C parser
+                pass
+        return pd.read_csv(io.BytesIO(file_contents), sep=delimiter)
+
+    def _read_excel(self, file_contents: bytes) -> pd.DataFrame:
+        """Read a workbook with calamine when installed, else pandas' default openpyxl/xlrd"""
+        if self.use_polars:
+            try:
+                return self._polars_to_pandas(pl.read_excel(file_contents, engine="calamine"))
+            except (ImportError, pl.exceptions.PolarsError):
+                # polars' calamine engine needs the optional fastexcel package
+                pass
+        if CALAMINE_AVAILABLE:
+            try:
+                return pd.read_excel(io.BytesIO(file_contents), engine="calamine")
+            except ValueError:
+                # pandas < 2.2 has no calamine engine; genuinely bad files fail again below
+                pass
+        return pd.read_excel(io.BytesIO(file_contents))
+
+    def _polars_to_pandas(self, frame) -> pd.DataFrame:
+        # Drop all-empty rows in Rust before converting at the pandas boundary
+        return frame.filter(~pl.all_horizontal(pl.all().is_null())).to_pandas()
+
+    def _arrow_read_csv(self, file_contents: bytes, delimiter: str, column_types: Optional[Dict] = None):
+        # py_buffer wraps the upload without a copy; Arrow reads it from C++
+        return pa_csv.read_csv(
+            pa.py_buffer(file_contents),
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+            convert_options=pa_csv.ConvertOptions(strings_can_be_null=True, column_types=column_types or {}),
+        )
+
+    def _format_output(self, df: pd.DataFrame, format: str):
+        """Cleaned frame as records (lazy dicts), an Arrow table or a JSON string"""
+        if format == "arrow":
+            if not PYARROW_AVAILABLE:
+                raise ImportError("pyarrow is required for the arrow output format")
+            # Columnar and shares numeric buffers with the frame where it can
+            return pa.Table.from_pandas(df, preserve_index=False)
+        if format == "json":
+            # C-level writer; no per-row dicts are built
+            return df.to_json(orient="records")
+        # Rows are only turned into dicts when a consumer reads them
+        return RecordView(df)
+
+    def _peek_headers(self, file_contents: bytes) -> pd.DataFrame:
+        """Header-only frame, enough for _smart_pattern_detection without parsing rows"""
+        delimiter, encoding = self._sniff_csv(file_contents)
+        header = pd.read_csv(
+            io.BytesIO(file_contents), sep=delimiter, encoding=encoding, encoding_errors="replace", nrows=0
+        )
+        header.columns = [col.strip() for col in header.columns]
+        return header
+
+    def _iter_records(self, file_contents: bytes, chunksize: int) -> Iterator[Dict]:
+        """Yield cleaned row dicts one chunk at a time
+
+        Empty rows are dropped per chunk; empty columns are kept, since a column
+        can only be known to be empty once the whole file has been read.
+        """
+        delimiter, encoding = self._sniff_csv(file_contents)
+        reader = pd.read_csv(
+            io.BytesIO(file_contents),
+            sep=delimiter,
+            encoding=encoding,
+            encoding_errors="replace",
+            chunksize=chunksize,
+        )
+        for chunk in reader:
+            chunk = chunk.dropna(how="all")
+            chunk.columns = [col.strip() for col in chunk.columns]
+            yield from RecordView(chunk)
+
     def _clean_dataframe(self, df):
-        # Standard DataFrame cleansing
-        df = df.dropna(how="all").dropna(axis=1, how="all")
+        # Standard DataFrame cleansing: drop empty rows/columns from one notna pass
+        present = df.notna().to_numpy()
+        df = df.iloc[present.any(axis=1), present.any(axis=0)].reset_index(drop=True)
         df.columns = [col.strip() for col in df.columns]
-        df = df.reset_index(drop=True)
         return df
 
     def _smart_pattern_detection(self, df: pd.DataFrame, filename: str):
-        columns = [col.lower() for col in df.columns]
-        filename_lower = filename.lower()
-
-        # POS system patterns (simplified example)
-        pos_patterns = {
-            "square": ["gross sales", "net sales", "tax", "tip", "fees", "item name"],
-            "toast": ["item", "quantity", "gross", "discount", "net"],
-            "clover": ["name", "price", "amount", "tax"],
-        }
+        # Detection only looks at the headers, so daily exports sharing a schema
+        # reuse the memoized result; the mapping is copied so callers can't alter it
+        analysis = self._detect_schema(tuple(df.columns))
+        return {**analysis, "column_mapping": dict(analysis["column_mapping"])}
+
+    def _detect_schema(self, columns: Tuple[str, ...]) -> Dict:
+        # Normalise headers once; every check below works on the lowercased names
+        lower_cols = [col.lower() for col in columns]
 
         pos_system = "unknown"
         pos_confidence = 0.0
 
-        for system, patterns in pos_patterns.items():
-            matches = sum(pattern in columns for pattern in patterns)
-            confidence = matches / len(patterns)
+        col_set = frozenset(lower_cols)
+        # Headers never contain newlines, so one scan of the joined names finds
+        # every phrase that sits inside any header
+        joined = "\n".join(lower_cols)
+
+        for system, (words, phrase_regex, total) in self._POS_PATTERN_SETS.items():
+            matches = len(words & col_set)
+            # Phrases are only scanned while they could still lift this system
+            # past the current leader
+            if phrase_regex is not None and (matches + total - len(words)) / total > pos_confidence:
+                matches += len(set(phrase_regex.findall(joined)))
+            confidence = matches / total
             if confidence > pos_confidence:
                 pos_confidence = confidence
                 pos_system = system
+                # Ties keep the earlier system, so a full match cannot be beaten
+                if confidence == 1.0:
+                    break
 
-        # Data type assignment
-        data_type_patterns = {
-            "sales": ["item", "quantity", "price", "total"],
-            "inventory": ["item", "stock", "quantity"],
-            "accounting": ["vendor", "invoice", "total"],
-        }
+        # Score every column against the union of all patterns in a single C call;
+        # shared patterns ("item", "total", ...) are only compared once
+        scores = self._pattern_scores(lower_cols, self._ALL_DATA_TYPE_TOKENS)
 
-        best_data_type = "other"
-        best_confidence = 0.0
+        # Best pattern per column, summed over columns, normalised per type
+        membership = self._DATA_TYPE_MEMBERSHIP
+        matches = np.where(membership[:, None, :], scores[None, :, :], 0).max(axis=2).sum(axis=1)
+        confidences = matches / self._DATA_TYPE_SIZES
 
-        for data_type, required_fields in data_type_patterns.items():
-            matches = sum(max(fuzz.ratio(col, pattern) for pattern in required_fields) for col in columns)
-            confidence = matches / (len(required_fields) * 100)
-            if confidence > best_confidence:
-                best_confidence = confidence
-                best_data_type = data_type
+        # First type with the highest non-zero confidence, else "other"
+        best = int(confidences.argmax())
+        best_data_type = self._DATA_TYPE_NAMES[best] if confidences[best] > 0 else "other"
 
         # Column mapping (simplified)
-        column_mapping = {
-            col: "item_name" if "item" in col else "quantity"
-            for col in df.columns
-        }
+        is_item = np.char.find(np.asarray(lower_cols, dtype=str), "item") >= 0
+        column_mapping = dict(zip(columns, np.where(is_item, "item_name", "quantity").tolist()))
 
         return {
             "data_type": best_data_type,
@@ -130,6 +424,29 @@ class AIExcelParser:
             "column_mapping": column_mapping,
         }
 
+    def _pattern_scores(self, columns: List[str], patterns: Tuple[str, ...]) -> np.ndarray:
+        """Fuzzy score matrix (columns x patterns), reusing rows cached from earlier files"""
+        # Exact pattern hits are the common case on clean POS exports and need no DP
+        exact = _pattern_self_scores(patterns)
+        missing = [
+            col for col in dict.fromkeys(columns)
+            if col not in exact and (patterns, col) not in self._sim_cache
+        ]
+        if missing:
+            if len(self._sim_cache) + len(missing) > SIM_CACHE_SIZE:
+                self._sim_cache.clear()
+            # The cutoff lets rapidfuzz reject on the length bound before the DP
+            fresh = process.cdist(
+                missing, patterns, scorer=SCORER, dtype=np.uint8,
+                score_cutoff=SCORE_CUTOFF, workers=-1,
+            )
+            self._sim_cache.update(((patterns, col), row) for col, row in zip(missing, fresh))
+
+        scores = np.empty((len(columns), len(patterns)), dtype=np.uint8)
+        for i, col in enumerate(columns):
+            scores[i] = exact[col] if col in exact else self._sim_cache[(patterns, col)]
+        return scores
+
     def _get_error_suggestions(self, error):
         suggestions = [
             "Check file format (.csv/.xlsx)",
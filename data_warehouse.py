@@ -1,23 +1,50 @@
 import pandas as pd
 import numpy as np
 
-from typing import Dict, List, Set, Optional, Tuple, Any
+from typing import Dict, List, Set, Optional, Tuple, Any, Iterator
+from collections import OrderedDict
 from datetime import datetime
 import json
 from database import RestaurantDB
+from inventory_optimizer import InventoryOptimizer
 
 
 class RestaurantDataWarehouse:
     """Central data management system for restaurant analytics"""
     
+    # Decoded datasets kept in memory; each holds a full copy of its rows, so
+    # this bounds the cache by dataset count, not size
+    DATA_CACHE_SIZE = 16
+    
     def __init__(self, db_path: str = 'restaurant_analytics.db'):
         self.db = RestaurantDB(db_path)
-        self.relationships = {}
+        # (first_id, second_id) in rule order -> relationship, plus each
+        # dataset's neighbours mapped to the key they share
+        self.relationships: Dict[Tuple[str, str], Dict] = {}
+        self._related_keys: Dict[str, Dict[str, Tuple[str, str]]] = {}
         self.last_updated = datetime.now()
         # Load existing datasets metadata from DB on init
         self.metadata = {ds['dataset_id']: ds for ds in self.db.get_all_datasets_metadata()}
+        # Lower-cased item names get one bit each; every dataset's items are
+        # kept as a packed uint64 bitmap over that vocabulary
+        self._item_vocab: Dict[str, int] = {}
+        self._item_bitmaps: Dict[str, np.ndarray] = {}
+        # LRU of dataset_id -> rows, so repeated reads skip SQLite and json.loads
+        self._data_cache: 'OrderedDict[str, List[Dict]]' = OrderedDict()
+        # Same, column-oriented, for the analytics that work on DataFrames
+        self._frame_cache: 'OrderedDict[str, pd.DataFrame]' = OrderedDict()
+        self._inventory_optimizer: Optional[InventoryOptimizer] = None
+        # (last_updated, stats) from the last get_warehouse_stats call
+        self._stats_cache: Optional[Tuple[datetime, Dict]] = None
 
     
+    @property
+    def inventory_optimizer(self) -> InventoryOptimizer:
+        """Shared InventoryOptimizer, created on first use"""
+        if self._inventory_optimizer is None:
+            self._inventory_optimizer = InventoryOptimizer()
+        return self._inventory_optimizer
+    
     def add_dataset(self, dataset_id: str, data_type: str, data: List[Dict], source_file: str = None) -> bool:
         """Add a new dataset to the warehouse
         
@@ -37,6 +64,8 @@ class RestaurantDataWarehouse:
         success = self.db.add_dataset(dataset_id, data_type, data, source_file)
         if not success:
             return False
+        self._data_cache.pop(dataset_id, None)
+        self._frame_cache.pop(dataset_id, None)
 
         # Update in-memory metadata after successful DB operation
         self.metadata[dataset_id] = {
@@ -47,6 +76,8 @@ class RestaurantDataWarehouse:
             'columns': list(data[0].keys()) if data else [],
         }
         
+        self._index_items(dataset_id, data)
+        
         # Update relationships with other datasets
         self._update_relationships(dataset_id)
         
@@ -54,14 +85,47 @@ class RestaurantDataWarehouse:
         return True
     
     def get_dataset(self, dataset_id: str) -> Optional[List[Dict]]:
-        """Retrieve a dataset by ID from the database"""
+        """Retrieve a dataset by ID, from the in-memory cache or the database
+        
+        Cached rows are shared between callers and must not be modified.
+        """
+        if dataset_id in self._data_cache:
+            self._data_cache.move_to_end(dataset_id)
+            return self._data_cache[dataset_id]
+        
+        dataset_record = self.db.get_dataset(dataset_id)
+        if not dataset_record:
+            return None
+        
+        self._data_cache[dataset_id] = dataset_record['data']
+        if len(self._data_cache) > self.DATA_CACHE_SIZE:
+            self._data_cache.popitem(last=False)
+        return dataset_record['data']
+    
+    def get_dataset_frame(self, dataset_id: str) -> Optional[pd.DataFrame]:
+        """Retrieve a dataset by ID as a DataFrame, built once and kept column-wise
+        
+        Cached frames are shared between callers and must not be modified.
+        """
+        if dataset_id in self._frame_cache:
+            self._frame_cache.move_to_end(dataset_id)
+            return self._frame_cache[dataset_id]
+        
+        # Read straight from the database so the row cache isn't filled too
         dataset_record = self.db.get_dataset(dataset_id)
-        return dataset_record['data'] if dataset_record else None
+        if not dataset_record:
+            return None
+        
+        frame = pd.DataFrame(dataset_record['data'])
+        self._frame_cache[dataset_id] = frame
+        if len(self._frame_cache) > self.DATA_CACHE_SIZE:
+            self._frame_cache.popitem(last=False)
+        return frame
     
     def get_datasets_by_type(self, data_type: str) -> Dict[str, List[Dict]]:
         """Get all datasets of a specific type from the database"""
-        dataset_records = self.db.get_datasets_by_type(data_type)
-        return {ds['dataset_id']: ds['data'] for ds in dataset_records}
+        # Only the ids and payloads are needed, so skip the column lists and metadata
+        return {dataset_id: data for dataset_id, (_, data) in self.db.get_datasets_for_types([data_type]).items()}
     
     def get_all_data_types(self) -> Set[str]:
         """Get all unique data types in the warehouse from the database"""
@@ -71,6 +135,10 @@ class RestaurantDataWarehouse:
         """Get the count of datasets from the database"""
         return self.db.get_dataset_count()
     
+    def iter_combined_dataset(self, data_type: str) -> Iterator[Dict]:
+        """Stream the rows of all datasets of a specific type from the database"""
+        return self.db.iter_combined_dataset(data_type)
+    
     def get_combined_dataset(self, data_type: str) -> List[Dict]:
         """Combine all datasets of a specific type from the database"""
         return self.db.get_combined_dataset(data_type)
@@ -78,7 +146,6 @@ class RestaurantDataWarehouse:
     def _update_relationships(self, new_dataset_id: str) -> None:
         """Detect and update relationships between datasets"""
         new_data_type = self.metadata[new_dataset_id]['data_type']
-        new_data = self.get_dataset(new_dataset_id) # Retrieve data from DB
         
         # Define relationship rules
         relationship_rules = {
@@ -88,54 +155,107 @@ class RestaurantDataWarehouse:
             ('sales', 'recipes'): self._detect_sales_recipe_relationship,
         }
         
+        # Only datasets of a type some rule pairs with the new one can relate
+        # to it; a rule with the new type first wins over a reversed one
+        compatible = {}
+        for (first_type, second_type), rule in relationship_rules.items():
+            if first_type == new_data_type:
+                compatible.setdefault(second_type, (rule, True))
+        for (first_type, second_type), rule in relationship_rules.items():
+            if second_type == new_data_type:
+                compatible.setdefault(first_type, (rule, False))
+        compatible.pop(new_data_type, None)
+        if not compatible:
+            return
+        
+        related_ids = [dataset_id for dataset_id, metadata in self.metadata.items()
+                       if dataset_id != new_dataset_id and metadata['data_type'] in compatible]
+        
+        # Load every related dataset that has no item bitmap yet in one query,
+        # rather than one get_dataset round-trip per dataset inside the loop
+        if any(dataset_id not in self._item_bitmaps for dataset_id in related_ids):
+            for dataset_id, (_, data) in self.db.get_datasets_for_types(compatible).items():
+                if dataset_id not in self._item_bitmaps:
+                    self._index_items(dataset_id, data)
+        
         # Check for relationships with existing datasets
-        for dataset_id, metadata in self.metadata.items():
-            if dataset_id == new_dataset_id:
-                continue
-                
-            existing_data_type = metadata['data_type']
-            existing_data = self.get_dataset(dataset_id) # Retrieve data from DB
-            
-            # Check if we have a rule for this combination
-            rule_key = (new_data_type, existing_data_type)
-            reverse_rule_key = (existing_data_type, new_data_type)
-            
-            if rule_key in relationship_rules:
-                relationship = relationship_rules[rule_key](new_data, existing_data)
+        for dataset_id in related_ids:
+            rule, new_first = compatible[self.metadata[dataset_id]['data_type']]
+            if new_first:
+                relationship = rule(new_dataset_id, dataset_id)
                 if relationship:
-                    self.relationships[f"{new_dataset_id}-{dataset_id}"] = relationship
-            elif reverse_rule_key in relationship_rules:
-                relationship = relationship_rules[reverse_rule_key](existing_data, new_data)
+                    self._add_relationship(new_dataset_id, dataset_id, relationship)
+            else:
+                relationship = rule(dataset_id, new_dataset_id)
                 if relationship:
-                    self.relationships[f"{dataset_id}-{new_dataset_id}"] = relationship
+                    self._add_relationship(dataset_id, new_dataset_id, relationship)
     
-    def _detect_sales_inventory_relationship(self, sales_data: List[Dict], inventory_data: List[Dict]) -> Optional[Dict]:
+    def _add_relationship(self, first_id: str, second_id: str, relationship: Dict) -> None:
+        """Store a relationship and index it under both datasets"""
+        key = (first_id, second_id)
+        self.relationships[key] = relationship
+        self._related_keys.setdefault(first_id, {})[second_id] = key
+        self._related_keys.setdefault(second_id, {})[first_id] = key
+    
+    def _index_items(self, dataset_id: str, data: List[Dict]) -> np.ndarray:
+        """Build and store the item-name bitmap of a dataset"""
+        vocab = self._item_vocab
+        # setdefault's default is evaluated first, so new names get the next bit
+        bits = np.fromiter((vocab.setdefault(name, len(vocab)) for name in self._item_names(data)),
+                           dtype=np.int64)
+        bitmap = np.zeros((len(vocab) + 63) // 64, dtype=np.uint64)
+        np.bitwise_or.at(bitmap, bits >> 6, np.left_shift(np.uint64(1), (bits & 63).astype(np.uint64)))
+        self._item_bitmaps[dataset_id] = bitmap
+        return bitmap
+    
+    def _item_bitmap(self, dataset_id: str) -> np.ndarray:
+        """Item-name bitmap of a dataset, built from the stored data on first use"""
+        bitmap = self._item_bitmaps.get(dataset_id)
+        if bitmap is None:
+            bitmap = self._index_items(dataset_id, self.get_dataset(dataset_id) or [])
+        return bitmap
+    
+    @staticmethod
+    def _popcount(bitmap: np.ndarray) -> int:
+        """Number of set bits in a bitmap"""
+        if hasattr(np, 'bitwise_count'):
+            return int(np.bitwise_count(bitmap).sum())
+        return sum(int(word).bit_count() for word in bitmap.tolist())
+    
+    def _detect_sales_inventory_relationship(self, sales_id: str, inventory_id: str) -> Optional[Dict]:
         """Detect relationships between sales and inventory data"""
-        # Extract item names from both datasets
-        sales_items = set()
-        for item in sales_data:
-            if 'item_name' in item and item['item_name']:
-                sales_items.add(item['item_name'].lower())
-        
-        inventory_items = set()
-        for item in inventory_data:
-            if 'item_name' in item and item['item_name']:
-                inventory_items.add(item['item_name'].lower())
+        sales_items = self._item_bitmap(sales_id)
+        inventory_items = self._item_bitmap(inventory_id)
         
-        # Find common items
-        common_items = sales_items.intersection(inventory_items)
+        # Find common items; bits past the shorter bitmap are unset in it
+        width = min(len(sales_items), len(inventory_items))
+        common = np.bitwise_and(sales_items[:width], inventory_items[:width])
+        common_count = self._popcount(common)
         
-        if common_items:
+        if common_count:
+            # Item strings are only recovered when there is a match to report
+            names = list(self._item_vocab)
+            positions = np.flatnonzero(np.unpackbits(common.astype('<u8').view(np.uint8), bitorder='little'))
             return {
                 'type': 'sales_inventory',
-                'strength': len(common_items) / max(len(sales_items), len(inventory_items)),
-                'common_items': list(common_items),
-                'common_item_count': len(common_items),
+                'strength': common_count / max(self._popcount(sales_items), self._popcount(inventory_items)),
+                'common_items': [names[position] for position in positions.tolist()],
+                'common_item_count': common_count,
                 'relationship_description': 'Sales and inventory data share item names'
             }
         return None
     
-    def _detect_sales_supplier_relationship(self, sales_data: List[Dict], supplier_data: List[Dict]) -> Optional[Dict]:
+    @staticmethod
+    def _item_names(data: List[Dict]) -> Set[str]:
+        """Lower-cased, non-empty item names of a dataset
+        
+        Only string names count: NaN, numeric names and rows that aren't dicts
+        are skipped, so indexing cannot fail add_dataset after its database write.
+        """
+        names = (item.get('item_name') for item in data if isinstance(item, dict))
+        return {name.lower() for name in names if isinstance(name, str) and name}
+    
+    def _detect_sales_supplier_relationship(self, sales_id: str, supplier_id: str) -> Optional[Dict]:
         """Detect relationships between sales and supplier data"""
         # This is a placeholder - in a real system we would implement more sophisticated detection
         return {
@@ -144,7 +264,7 @@ class RestaurantDataWarehouse:
             'relationship_description': 'Sales and supplier data may be related through items'
         }
     
-    def _detect_inventory_supplier_relationship(self, inventory_data: List[Dict], supplier_data: List[Dict]) -> Optional[Dict]:
+    def _detect_inventory_supplier_relationship(self, inventory_id: str, supplier_id: str) -> Optional[Dict]:
         """Detect relationships between inventory and supplier data"""
         # This is a placeholder - in a real system we would implement more sophisticated detection
         return {
@@ -153,54 +273,67 @@ class RestaurantDataWarehouse:
             'relationship_description': 'Inventory and supplier data may be related through items'
         }
     
-    def _detect_sales_recipe_relationship(self, sales_data: List[Dict], recipe_data: List[Dict]) -> Optional[Dict]:
+    def _detect_sales_recipe_relationship(self, sales_id: str, recipe_id: str) -> Optional[Dict]:
         """Detect relationships between sales and recipe data"""
         # This is a placeholder since we don't have recipe data yet
         return None
     
     def get_related_datasets(self, dataset_id: str) -> Dict[str, Dict]:
         """Get all datasets that are related to the given dataset"""
-        related = {}
-        
-        for rel_key, rel_data in self.relationships.items():
-            ids = rel_key.split('-')
-            if dataset_id in ids:
-                other_id = ids[0] if ids[1] == dataset_id else ids[1]
-                related[other_id] = {
-                    'relationship': rel_data,
-                    'metadata': self.metadata[other_id]
-                }
-        
-        return related
+        return {
+            other_id: {
+                'relationship': self.relationships[key],
+                'metadata': self.metadata[other_id]
+            }
+            for other_id, key in self._related_keys.get(dataset_id, {}).items()
+        }
     
-    def generate_cross_dataset_insights(self) -> List[Dict]:
-        """Generate insights by analyzing multiple datasets together"""
+    def generate_cross_dataset_insights(self, file_id: Optional[int] = None) -> List[Dict]:
+        """Generate insights by analyzing multiple datasets together
+        
+        When ``file_id`` is given the insights are also logged against that
+        upload, all in one transaction.
+        """
         insights = []
         
         # Generate insights for each relationship type
-        for rel_key, rel_data in self.relationships.items():
-            dataset_ids = rel_key.split('-')
-            
+        optimizer = self.inventory_optimizer
+        for dataset_ids, rel_data in self.relationships.items():
             if rel_data['type'] == 'sales_inventory':
                 # Generate sales-inventory insights using the new InventoryOptimizer
-                optimizer = InventoryOptimizer()
-                sales_data = self.get_dataset(dataset_ids[0])
-                inventory_data = self.get_dataset(dataset_ids[1])
+                sales_data = self.get_dataset_frame(dataset_ids[0])
+                inventory_data = self.get_dataset_frame(dataset_ids[1])
                 
-                if sales_data and inventory_data:
+                if sales_data is not None and inventory_data is not None \
+                        and not sales_data.empty and not inventory_data.empty:
                     sales_inventory_insights = optimizer.generate_inventory_insights(sales_data, inventory_data)
                     insights.extend(sales_inventory_insights)
         
+        if file_id is not None and insights:
+            self.db.log_insights_bulk([
+                (file_id, insight['type'], insight, insight.get('confidence_score', 0.8))
+                for insight in insights
+            ])
+        
         return insights
     
     def get_warehouse_stats(self) -> Dict:
-        """Get statistics about the data warehouse"""
+        """Get statistics about the data warehouse
+        
+        Computed once per change: add_dataset moves last_updated, which is
+        what the cached copy is checked against.
+        """
+        if self._stats_cache and self._stats_cache[0] == self.last_updated:
+            return dict(self._stats_cache[1])
+        
+        summary = self.db.get_type_summary()
         stats = {
-            'dataset_count': self.db.get_dataset_count(),
+            'dataset_count': sum(count for _, count, _ in summary),
             'relationship_count': len(self.relationships),
-            'data_types': list(self.get_all_data_types()),
-            'total_records': sum(ds['row_count'] for ds in self.db.get_all_datasets_metadata()),
+            'data_types': [data_type for data_type, _, _ in summary],
+            'total_records': sum(rows for _, _, rows in summary),
             'last_updated': self.last_updated.isoformat()
         }
         
-        return stats
+        self._stats_cache = (self.last_updated, stats)
+        return dict(stats)
@@ -1,215 +1,429 @@
 import os
+import math
+import atexit
 import sqlite3
 import json
-from typing import List, Dict, Any, Optional
+import threading
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
 
 DATABASE_PATH = 'restaurant_analytics.db'
 
+# Bulk inserts commit every this many rows, bounding the WAL a single batch grows
+BULK_COMMIT_ROWS = 10000
+
+# Cached forecasts are served for this long, and deleted once older than the retention
+WEATHER_CACHE_TTL_HOURS = 24
+WEATHER_CACHE_RETENTION_DAYS = 7
+
+# Write statements, shared so every call hands sqlite3 the same text and hits
+# the connection's prepared-statement cache
+_INS_UPLOAD = """
+    INSERT INTO uploaded_files (name, file_size, data_type)
+    VALUES (?,?,?)
+"""
+_INS_UPLOAD_RETURNING = _INS_UPLOAD.rstrip() + " RETURNING id"
+_INS_INSIGHT = """
+    INSERT INTO insights (file_id, insight_category, insight_details, confidence)
+    VALUES (?,?,?,?)
+"""
+_UPSERT_DATASET = """
+    INSERT INTO datasets (dataset_id, data_type, source_file, row_count, columns, data)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(dataset_id) DO UPDATE
+    SET data_type = excluded.data_type, source_file = excluded.source_file, row_count = excluded.row_count,
+        columns = excluded.columns, data = excluded.data, added_at = DATETIME('now')
+"""
+_UPD_DATASET = """
+    UPDATE datasets
+    SET data_type = ?, source_file = ?, row_count = ?, columns = ?, data = ?, added_at = DATETIME('now')
+    WHERE dataset_id = ?
+"""
+_UPSERT_WEATHER = """
+    INSERT INTO weather_cache (location, date, weather_data, created_at)
+    VALUES (?, ?, ?, DATETIME('now'))
+    ON CONFLICT(location, date) DO UPDATE
+    SET weather_data = excluded.weather_data, created_at = excluded.created_at
+"""
+_DEL_STALE_WEATHER = "DELETE FROM weather_cache WHERE created_at < DATETIME('now', ?)"
+
+def _has_non_finite(value) -> bool:
+    """True if a float NaN/Infinity appears anywhere in a JSON-like value"""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(map(_has_non_finite, value.values()))
+    if isinstance(value, (list, tuple)):
+        return any(map(_has_non_finite, value))
+    return False
+
+def _dumps_bytes(value) -> bytes:
+    """Encode a value as UTF-8 JSON, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        try:
+            # Non-str keys and numpy values are encoded instead of rejected
+            encoded = orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            # orjson writes NaN/Infinity as null, which would read back as None;
+            # only a payload with a null in it can hold one, so only those are walked
+            if b'null' not in encoded or not _has_non_finite(value):
+                return encoded
+            try:
+                return json.dumps(value).encode()
+            except TypeError:
+                # numpy values json can't encode; keep orjson's nulls
+                return encoded
+    return json.dumps(value).encode()
+
+def _dumps(value) -> str:
+    """Encode a column value as JSON text"""
+    return _dumps_bytes(value).decode()
+
+def _loads(text):
+    """Decode a JSON column value, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # Rows written by json.dumps may hold NaN/Infinity, which orjson rejects
+            pass
+    return json.loads(text)
+
+# Leading byte of a compressed dataset payload; uncompressed payloads are
+# stored as JSON text and never start with it
+_PAYLOAD_ZSTD_JSON = b'\x01'
+
+def _encode_payload(value):
+    """Dataset payload for storage: zstd-compressed JSON bytes when zstandard is installed, else JSON text"""
+    if not ZSTD_AVAILABLE:
+        return _dumps(value)
+    # Compressor objects are not thread-safe, and creating one is cheap
+    return _PAYLOAD_ZSTD_JSON + zstandard.ZstdCompressor(level=3).compress(_dumps_bytes(value))
+
+def _decode_payload(stored):
+    """Inverse of _encode_payload; also reads uncompressed rows from older versions"""
+    if isinstance(stored, bytes):
+        if stored[:1] != _PAYLOAD_ZSTD_JSON:
+            raise ValueError("Unknown dataset payload encoding")
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Dataset payload is zstd-compressed; install zstandard to read it")
+        return _loads(zstandard.ZstdDecompressor().decompress(stored[1:]))
+    return _loads(stored)
+
+def _row_dicts(cursor: sqlite3.Cursor) -> Iterator[Dict[str, Any]]:
+    """Yield the cursor's remaining rows as {column: value} dicts"""
+    names = [description[0] for description in cursor.description]
+    for row in cursor:
+        yield dict(zip(names, row))
+
+class _ThreadConnection:
+    """One thread's connection, closed once the thread's locals are dropped"""
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        # sqlite3 connections can't be weakly referenced, so the holder is
+        # tracked instead; when its thread exits the connection goes with it
+        weakref.finalize(self, conn.close).atexit = False
+
+def _close_at_exit(db_ref: 'weakref.ref[RestaurantDB]'):
+    db = db_ref()
+    if db is not None:
+        db.close()
+
 class RestaurantDB:
     def __init__(self, db_path: str = DATABASE_PATH):
         self.db_path = db_path
-        self._create_tables()
+        # Each thread keeps one open connection; WAL lets readers and the
+        # writer proceed without blocking each other
+        self._local = threading.local()
+        self._connections: 'weakref.WeakSet[_ThreadConnection]' = weakref.WeakSet()
+        self._lock = threading.RLock()
+        # Tables are created on first connection, so constructing (or
+        # importing) the database touches no files
+        self._schema_ready = False
+        # A weak reference, so the hook doesn't keep every instance alive until exit
+        atexit.register(_close_at_exit, weakref.ref(self))
 
-    def _get_connection(self):
-        return sqlite3.connect(self.db_path)
+    def _get_connection(self) -> sqlite3.Connection:
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            # Autocommit; writes group themselves with _transaction. The
+            # connection's statement cache keeps the prepared INSERT/SELECTs
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                                   cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-64000")
+            # Memory-map up to 256 MB of the file so reads of large dataset
+            # blobs skip the copy into the page cache
+            conn.execute("PRAGMA mmap_size=268435456")
+            holder = self._local.holder = _ThreadConnection(conn)
+            with self._lock:
+                self._connections.add(holder)
+                if not self._schema_ready:
+                    self._create_tables()
+                    self._schema_ready = True
+        return holder.conn
 
-    def _create_tables(self):
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements as one transaction on this thread's connection"""
         conn = self._get_connection()
-        cursor = conn.cursor()
-
-        # Table for uploaded files metadata
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS uploaded_files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                file_size INTEGER NOT NULL,
-                data_type TEXT NOT NULL,
-                upload_time TEXT DEFAULT (DATETIME('now'))
-            )
-        """)
-
-        # Table for insights
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS insights (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_id INTEGER,
-                insight_category TEXT NOT NULL,
-                insight_details TEXT NOT NULL,
-                confidence REAL DEFAULT 0.0,
-                FOREIGN KEY(file_id) REFERENCES uploaded_files(id)
-            )
-        """)
-
-        # Generic table for storing parsed data (sales, inventory, etc.)
-        # Data is stored as JSON string for flexibility
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS datasets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                dataset_id TEXT UNIQUE NOT NULL,
-                data_type TEXT NOT NULL,
-                source_file TEXT,
-                row_count INTEGER,
-                added_at TEXT DEFAULT (DATETIME('now')),
-                columns TEXT, -- Stored as JSON string
-                data TEXT -- Stored as JSON string
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        # IMMEDIATE takes the write lock up front, so concurrent writers wait on
+        # the busy timeout instead of failing to upgrade a read lock
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        """Close every thread's connection"""
+        with self._lock:
+            holders, self._connections = list(self._connections), weakref.WeakSet()
+        for holder in holders:
+            # Refreshes planner statistics (ANALYZE) only for tables that need it
+            holder.conn.execute("PRAGMA optimize")
+            holder.conn.close()
+        self._local = threading.local()
+
+    def _create_tables(self):
+        with self._transaction() as conn:
+            cursor = conn.cursor()
+
+            # Table for uploaded files metadata
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS uploaded_files (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    data_type TEXT NOT NULL,
+                    upload_time TEXT DEFAULT (DATETIME('now'))
+                )
+            """)
+
+            # Table for insights
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS insights (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_id INTEGER,
+                    insight_category TEXT NOT NULL,
+                    insight_details TEXT NOT NULL,
+                    confidence REAL DEFAULT 0.0,
+                    FOREIGN KEY(file_id) REFERENCES uploaded_files(id)
+                )
+            """)
+
+            # Generic table for storing parsed data (sales, inventory, etc.)
+            # Data is stored as JSON string for flexibility
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS datasets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dataset_id TEXT UNIQUE NOT NULL,
+                    data_type TEXT NOT NULL,
+                    source_file TEXT,
+                    row_count INTEGER,
+                    added_at TEXT DEFAULT (DATETIME('now')),
+                    columns TEXT, -- Stored as JSON string
+                    data TEXT -- Stored as JSON string
+                )
+            """)
+
+            # One cached forecast per (location, date); saving again overwrites it
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS weather_cache (
+                    location TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    weather_data TEXT NOT NULL, -- Stored as JSON string
+                    created_at TEXT DEFAULT (DATETIME('now')),
+                    PRIMARY KEY (location, date)
+                )
+            """)
+
+            # Secondary indexes for the per-file and per-type lookups
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_insights_file ON insights(file_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_files_type ON uploaded_files(data_type)")
+            # Covers the per-type counts and row totals, so get_type_summary and
+            # get_all_data_types read only the index, never the dataset payloads;
+            # it also serves the data_type lookups the old single-column index did
+            cursor.execute("DROP INDEX IF EXISTS idx_datasets_type")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_datasets_type_rows ON datasets(data_type, row_count)")
 
     def add_uploaded_file_metadata(self, name: str, file_size: int, data_type: str) -> int:
         """Add new uploaded file record and return its ID"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO uploaded_files (name, file_size, data_type)
-            VALUES (?,?,?) RETURNING id
-        """, (name, file_size, data_type))
-        new_id = cursor.fetchone()[0]
-        conn.commit()
-        conn.close()
+        with self._transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_INS_UPLOAD_RETURNING, (name, file_size, data_type))
+            new_id = cursor.fetchone()[0]
         return new_id
 
+    def add_uploaded_files_bulk(self, rows: List[Tuple[str, int, str]]) -> List[int]:
+        """Add many (name, file_size, data_type) records in one transaction and return their IDs"""
+        if not rows:
+            return []
+        with self._transaction() as conn:
+            conn.executemany(_INS_UPLOAD, rows)
+            # cursor.lastrowid isn't set by executemany; the write lock held by
+            # the transaction makes the AUTOINCREMENT ids contiguous
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        first_id = last_id - len(rows) + 1
+        return list(range(first_id, last_id + 1))
+
+    def log_insights_bulk(self, rows: List[Tuple]):
+        """Store many (file_id, insight_category, insight_details, confidence) rows
+
+        Details that aren't already text are JSON-encoded. Rows are written
+        with executemany, one transaction per BULK_COMMIT_ROWS.
+        """
+        rows = ((file_id, category, details if isinstance(details, str) else _dumps(details), confidence)
+                for file_id, category, details, confidence in rows)
+        while True:
+            batch = list(islice(rows, BULK_COMMIT_ROWS))
+            if not batch:
+                break
+            with self._transaction() as conn:
+                conn.executemany(_INS_INSIGHT, batch)
+
     def log_insight(self, file_id: int, insight_category: str, insight_details: str, confidence: float = 0.8):
         """Store new AI-generated insight"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO insights (file_id, insight_category, insight_details, confidence)
-            VALUES (?,?,?,?)
-        """, (file_id, insight_category, insight_details, confidence))
-        conn.commit()
-        conn.close()
+        with self._transaction() as conn:
+            conn.execute(_INS_INSIGHT, (file_id, insight_category, insight_details, confidence))
 
     def log_error(self, file_id: int, error_message: str):
         """Log processing errors"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO insights (file_id, insight_category, insight_details, confidence)
-            VALUES (?,'error',?,0.0)
-        """, (file_id, error_message))
-        conn.commit()
-        conn.close()
+        self.log_insight(file_id, 'error', error_message, 0.0)
 
     def add_dataset(self, dataset_id: str, data_type: str, data: List[Dict], source_file: str = None) -> bool:
-        """Add a new dataset to the 'datasets' table"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        """Add a dataset to the 'datasets' table, replacing any existing one with the same ID"""
         try:
             row_count = len(data)
             columns = list(data[0].keys()) if data else []
-            cursor.execute("""
-                INSERT INTO datasets (dataset_id, data_type, source_file, row_count, columns, data)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (dataset_id, data_type, source_file, row_count, json.dumps(columns), json.dumps(data)))
-            conn.commit()
+            with self._transaction() as conn:
+                conn.execute(_UPSERT_DATASET, (dataset_id, data_type, source_file, row_count, _dumps(columns), _encode_payload(data)))
             return True
-        except sqlite3.IntegrityError:
-            print(f"Dataset with ID {dataset_id} already exists. Updating instead.")
-            return self.update_dataset(dataset_id, data_type, data, source_file)
         except Exception as e:
             print(f"Error adding dataset: {e}")
             return False
-        finally:
-            conn.close()
 
     def update_dataset(self, dataset_id: str, data_type: str, data: List[Dict], source_file: str = None) -> bool:
         """Update an existing dataset in the 'datasets' table"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
         try:
             row_count = len(data)
             columns = list(data[0].keys()) if data else []
-            cursor.execute("""
-                UPDATE datasets
-                SET data_type = ?, source_file = ?, row_count = ?, columns = ?, data = ?, added_at = DATETIME('now')
-                WHERE dataset_id = ?
-            """, (data_type, source_file, row_count, json.dumps(columns), json.dumps(data), dataset_id))
-            conn.commit()
+            with self._transaction() as conn:
+                conn.execute(_UPD_DATASET, (data_type, source_file, row_count, _dumps(columns), _encode_payload(data), dataset_id))
             return True
         except Exception as e:
             print(f"Error updating dataset: {e}")
             return False
-        finally:
-            conn.close()
 
     def get_dataset(self, dataset_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a dataset by its ID"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM datasets WHERE dataset_id = ?", (dataset_id,))
-        row = cursor.fetchone()
-        conn.close()
-        if row:
-            # Convert row to dictionary for easier access
-            columns = [description[0] for description in cursor.description]
-            dataset = dict(zip(columns, row))
-            dataset['data'] = json.loads(dataset['data'])
-            dataset['columns'] = json.loads(dataset['columns'])
-            return dataset
-        return None
+        cursor = self._get_connection().execute("SELECT * FROM datasets WHERE dataset_id = ?", (dataset_id,))
+        dataset = next(_row_dicts(cursor), None)
+        if dataset:
+            dataset['data'] = _decode_payload(dataset['data'])
+            dataset['columns'] = _loads(dataset['columns'])
+        return dataset
 
     def get_all_datasets_metadata(self) -> List[Dict[str, Any]]:
         """Retrieve metadata for all datasets"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT dataset_id, data_type, source_file, row_count, added_at, columns FROM datasets")
-        rows = cursor.fetchall()
-        conn.close()
-        
-        datasets_metadata = []
-        for row in rows:
-            columns = [description[0] for description in cursor.description]
-            metadata = dict(zip(columns, row))
-            metadata['columns'] = json.loads(metadata['columns'])
-            datasets_metadata.append(metadata)
+        cursor = self._get_connection().execute("SELECT dataset_id, data_type, source_file, row_count, added_at, columns FROM datasets")
+        datasets_metadata = list(_row_dicts(cursor))
+        for metadata in datasets_metadata:
+            metadata['columns'] = _loads(metadata['columns'])
         return datasets_metadata
 
     def get_datasets_by_type(self, data_type: str) -> List[Dict[str, Any]]:
         """Retrieve all datasets of a specific type"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM datasets WHERE data_type = ?", (data_type,))
-        rows = cursor.fetchall()
-        conn.close()
-        
-        datasets = []
-        for row in rows:
-            columns = [description[0] for description in cursor.description]
-            dataset = dict(zip(columns, row))
-            dataset['data'] = json.loads(dataset['data'])
-            dataset['columns'] = json.loads(dataset['columns'])
-            datasets.append(dataset)
+        cursor = self._get_connection().execute("SELECT * FROM datasets WHERE data_type = ? ORDER BY id", (data_type,))
+        datasets = list(_row_dicts(cursor))
+        for dataset in datasets:
+            dataset['data'] = _decode_payload(dataset['data'])
+            dataset['columns'] = _loads(dataset['columns'])
         return datasets
 
+    def get_datasets_for_types(self, data_types) -> Dict[str, Tuple[str, List[Dict]]]:
+        """Retrieve {dataset_id: (data_type, data)} for several types in one query"""
+        data_types = list(data_types)
+        if not data_types:
+            return {}
+        placeholders = ','.join('?' * len(data_types))
+        cursor = self._get_connection().execute(
+            f"SELECT dataset_id, data_type, data FROM datasets WHERE data_type IN ({placeholders}) ORDER BY id", data_types)
+        rows = cursor.fetchall()
+        return {dataset_id: (data_type, _decode_payload(data)) for dataset_id, data_type, data in rows}
+
     def get_all_data_types(self) -> List[str]:
         """Get all unique data types in the warehouse"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT data_type FROM datasets")
+        cursor = self._get_connection().execute("SELECT DISTINCT data_type FROM datasets")
         data_types = [row[0] for row in cursor.fetchall()]
-        conn.close()
         return data_types
 
     def get_dataset_count(self) -> int:
         """Get the count of datasets"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM datasets")
+        cursor = self._get_connection().execute("SELECT COUNT(*) FROM datasets")
         count = cursor.fetchone()[0]
-        conn.close()
         return count
 
+    def get_type_summary(self) -> List[Tuple[str, int, int]]:
+        """(data_type, dataset count, total rows) for every data type, in one query"""
+        cursor = self._get_connection().execute(
+            "SELECT data_type, COUNT(*), COALESCE(SUM(row_count), 0) FROM datasets GROUP BY data_type")
+        return cursor.fetchall()
+
+    def iter_combined_dataset(self, data_type: str) -> Iterator[Dict]:
+        """Yield the rows of every dataset of a specific type, one dataset decoded at a time"""
+        cursor = self._get_connection().execute("SELECT data FROM datasets WHERE data_type = ? ORDER BY id", (data_type,))
+        for (data,) in cursor:
+            yield from _decode_payload(data)
+
     def get_combined_dataset(self, data_type: str) -> List[Dict]:
         """Combine all datasets of a specific type into a single list of dictionaries"""
-        datasets = self.get_datasets_by_type(data_type)
-        combined_data = []
-        for dataset in datasets:
-            combined_data.extend(dataset['data'])
-        return combined_data
+        return list(self.iter_combined_dataset(data_type))
+
+    def get_weather_cache(self, location: str, date: str) -> Optional[Dict]:
+        """Cached forecast for a location and date, or None if missing or older than the TTL"""
+        cursor = self._get_connection().execute(
+            "SELECT weather_data FROM weather_cache WHERE location = ? AND date = ? AND created_at > DATETIME('now', ?)",
+            (location, date, f'-{WEATHER_CACHE_TTL_HOURS} hours'))
+        row = cursor.fetchone()
+        return _loads(row[0]) if row else None
+
+    def save_weather_cache(self, location: str, date: str, weather_data: Dict):
+        """Store (or replace) the forecast for a location and date, pruning expired entries"""
+        with self._transaction() as conn:
+            conn.execute(_UPSERT_WEATHER, (location, date, _dumps(weather_data)))
+            conn.execute(_DEL_STALE_WEATHER, (f'-{WEATHER_CACHE_RETENTION_DAYS} days',))
+
+@lru_cache(maxsize=1)
+def get_db() -> RestaurantDB:
+    """Shared RestaurantDB at DATABASE_PATH, created on first use"""
+    return RestaurantDB()
 
-# Initialize the database
-db = RestaurantDB()
-print(f"Database initialized at: {DATABASE_PATH}")
+def __getattr__(name: str):
+    # `database.db` used to be opened at import time; it is now built on first access
+    if name == 'db':
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
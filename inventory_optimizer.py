@@ -1,12 +1,14 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 class InventoryOptimizer:
     def __init__(self):
         pass
 
-    def generate_inventory_insights(self, sales_data: List[Dict], inventory_data: List[Dict]) -> List[Dict]:
-        """Generate insights based on sales and inventory data"""
+    def generate_inventory_insights(self, sales_data: Union[List[Dict], pd.DataFrame],
+                                    inventory_data: Union[List[Dict], pd.DataFrame]) -> List[Dict]:
+        """Generate insights based on sales and inventory data (rows or DataFrames, left unmodified)"""
         insights = []
         
         try:
@@ -25,12 +27,14 @@ class InventoryOptimizer:
             
             # Add lowercase column for matching
             sales_summary['item_lower'] = sales_summary['item_name'].str.lower()
-            inventory_df['item_lower'] = inventory_df['item_name'].str.lower()
+            inventory_df = inventory_df.assign(item_lower=inventory_df['item_name'].str.lower())
             
-            # Merge datasets
+            # Merge datasets, carrying only the inventory columns used below
+            inventory_columns = [column for column in ('item_name', 'quantity', 'unit_cost', 'item_lower')
+                                 if column in inventory_df.columns]
             merged = pd.merge(
                 sales_summary,
-                inventory_df,
+                inventory_df[inventory_columns],
                 left_on='item_lower',
                 right_on='item_lower',
                 how='inner',
@@ -48,15 +52,23 @@ class InventoryOptimizer:
                 # Find items at risk of stockout
                 stockout_risks = merged[merged['days_remaining'] < 7].sort_values('days_remaining')
                 
+                # Per-item figures computed column-wise, then one plain dict per row
+                stockout_risks = stockout_risks.assign(
+                    priority=np.where(stockout_risks['days_remaining'] < 3, 'high', 'medium'),
+                    order_qty=(stockout_risks['daily_usage'] * 14).astype(int),
+                    savings=(stockout_risks['daily_usage'] * stockout_risks['quantity_sold'] * 0.2).astype(int)  # Estimated lost sales prevention
+                )
+                
                 # Generate insights
-                for _, row in stockout_risks.iterrows():
+                for row in stockout_risks[['item_name_sales', 'days_remaining', 'quantity', 'daily_usage',
+                                           'priority', 'order_qty', 'savings']].to_dict(orient='records'):
                     insights.append({
                         'type': 'inventory_alert',
-                        'priority': 'high' if row['days_remaining'] < 3 else 'medium',
+                        'priority': row['priority'],
                         'title': f"⚠️ {row['item_name_sales']} Stockout Risk: {row['days_remaining']} Days Left",
                         'description': f"High-selling item with low inventory. Only {row['quantity']} units left with daily usage of {row['daily_usage']:.1f} units.",
-                        'recommendation': f"Order {int(row['daily_usage'] * 14)} units to maintain 2-week supply",
-                        'savings_potential': int(row['daily_usage'] * row['quantity_sold'] * 0.2),  # Estimated lost sales prevention
+                        'recommendation': f"Order {row['order_qty']} units to maintain 2-week supply",
+                        'savings_potential': row['savings'],
                         'confidence_score': 0.85,
                         'affected_items': [row['item_name_sales']]
                     })
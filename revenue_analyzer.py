@@ -171,11 +171,11 @@ class RevenueAnalyzer:
         total_revenue = 0
         total_quantity = 0
         
-        for item_name in df['item_name'].unique():
-            if pd.isna(item_name) or item_name == '':
+        # One grouping pass instead of a full-frame mask per item; groups come
+        # in first-seen order and missing names are dropped
+        for item_name, item_data in df.groupby('item_name', sort=False):
+            if item_name == '':
                 continue
-                
-            item_data = df[df['item_name'] == item_name]
             
             # Basic metrics
             quantity_sold = item_data.get('quantity', 1).sum()
@@ -11,14 +11,24 @@ import sqlite3
 from typing import Dict, List, Optional
 import requests
 import time
+from functools import lru_cache
 from menu_engineering import MenuEngineering
 from inventory_optimizer import InventoryOptimizer
 
-def get_sample_data() -> pd.DataFrame:
-    """Load sample sales data from a demo CSV"""
+@lru_cache(maxsize=1)
+def _read_sample_csv() -> pd.DataFrame:
     demo_file_path = 'demo-data/sample-sales-data.csv'
     return pd.read_csv(demo_file_path)
 
+def get_sample_data(copy: bool = True) -> pd.DataFrame:
+    """Load sample sales data from a demo CSV
+
+    The CSV is parsed once per process; pass copy=False for read-only use of
+    the cached frame.
+    """
+    sample_data = _read_sample_csv()
+    return sample_data.copy() if copy else sample_data
+
 # Import our custom modules
 try:
     from database import RestaurantDB
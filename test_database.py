@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the RestaurantDB storage layer, run against a temporary database
+"""
+
+import sqlite3
+
+from database import RestaurantDB
+
+
+def _make_db(tmp_path):
+    return RestaurantDB(str(tmp_path / 'test.db'))
+
+
+def test_add_and_get_dataset(tmp_path):
+    db = _make_db(tmp_path)
+    rows = [{'item': 'Burger', 'price': 9.5}, {'item': 'Fries', 'price': 3.0}]
+    assert db.add_dataset('sales_1', 'sales', rows, 'sales.csv')
+
+    dataset = db.get_dataset('sales_1')
+    assert dataset['data'] == rows
+    assert dataset['columns'] == ['item', 'price']
+    assert dataset['data_type'] == 'sales'
+    assert dataset['source_file'] == 'sales.csv'
+    assert dataset['row_count'] == 2
+    assert db.get_dataset('missing') is None
+    db.close()
+
+
+def test_add_dataset_replaces_existing_id(tmp_path):
+    db = _make_db(tmp_path)
+    db.add_dataset('sales_1', 'sales', [{'item': 'Burger'}])
+    assert db.add_dataset('sales_1', 'sales', [{'item': 'Salad'}, {'item': 'Soup'}])
+
+    dataset = db.get_dataset('sales_1')
+    assert dataset['data'] == [{'item': 'Salad'}, {'item': 'Soup'}]
+    assert dataset['row_count'] == 2
+    assert db.get_dataset_count() == 1
+    db.close()
+
+
+def test_combined_dataset_keeps_insertion_order(tmp_path):
+    db = _make_db(tmp_path)
+    db.add_dataset('a', 'sales', [{'n': 1}, {'n': 2}])
+    db.add_dataset('b', 'sales', [{'n': 3}])
+    db.add_dataset('other', 'inventory', [{'n': 99}])
+    db.add_dataset('c', 'sales', [{'n': 4}])
+    # Replacing a dataset keeps its original position
+    db.add_dataset('a', 'sales', [{'n': 0}])
+
+    assert db.get_combined_dataset('sales') == [{'n': 0}, {'n': 3}, {'n': 4}]
+    assert db.get_combined_dataset('inventory') == [{'n': 99}]
+    assert db.get_combined_dataset('labor') == []
+    db.close()
+
+
+def test_insights_are_written_immediately(tmp_path):
+    db = _make_db(tmp_path)
+    file_id = db.add_uploaded_file_metadata('sales.csv', 10, 'sales')
+    db.log_insight(file_id, 'trend', 'Sales are up', 0.9)
+    db.log_error(file_id, 'Bad row 7')
+
+    # A separate connection sees the rows without any flush or close
+    with sqlite3.connect(db.db_path) as other:
+        rows = other.execute(
+            "SELECT file_id, insight_category, insight_details, confidence FROM insights ORDER BY id").fetchall()
+    assert rows == [(file_id, 'trend', 'Sales are up', 0.9), (file_id, 'error', 'Bad row 7', 0.0)]
+    db.close()
+
+
+def test_log_insights_bulk(tmp_path):
+    db = _make_db(tmp_path)
+    db.log_insights_bulk([(1, 'summary', 'Text detail', 0.5), (1, 'stats', {'rows': 3}, 0.7)])
+
+    with sqlite3.connect(db.db_path) as other:
+        rows = other.execute("SELECT insight_category, insight_details FROM insights ORDER BY id").fetchall()
+    assert rows[0] == ('summary', 'Text detail')
+    assert rows[1][0] == 'stats'
+    assert rows[1][1].replace(' ', '') == '{"rows":3}'
+    db.close()
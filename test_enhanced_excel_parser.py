@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for EnhancedExcelParser's processed output, in both output formats
+"""
+
+import pandas as pd
+
+from enhanced_excel_parser import EnhancedExcelParser
+
+SALES_CSV = (b"Date,Item Name,Quantity,Price,Total\n"
+             b"2024-01-05,Burger,2,9.5,19\n"
+             b"2024-01-06,Fries,1,3.25,\n"
+             b",,,,\n"
+             b"2024-01-07,Soda,3,1.5,4.5\n")
+
+# The list-of-dicts contract: one dict per kept row, mapped fields first and
+# then only the enrichments that apply to that row
+EXPECTED_RECORDS = [
+    {'_original_index': 0, 'date': '2024-01-05', 'item_name': 'Burger', 'quantity': 2.0,
+     'unit_price': 9.5, 'total_amount': 19.0, 'day_of_week': 'Friday', 'month': 1,
+     'year': 2024, 'quarter': 'Q1', 'is_weekend': False, 'inferred_category': 'Sandwiches'},
+    {'_original_index': 1, 'date': '2024-01-06', 'item_name': 'Fries', 'quantity': 1.0,
+     'unit_price': 3.25, 'total_amount': None, 'day_of_week': 'Saturday', 'month': 1,
+     'year': 2024, 'quarter': 'Q1', 'is_weekend': True, 'calculated_total': 3.25,
+     'inferred_category': 'Appetizers'},
+    {'_original_index': 2, 'date': '2024-01-07', 'item_name': 'Soda', 'quantity': 3.0,
+     'unit_price': 1.5, 'total_amount': 4.5, 'day_of_week': 'Sunday', 'month': 1,
+     'year': 2024, 'quarter': 'Q1', 'is_weekend': True, 'inferred_category': 'Beverages'},
+]
+
+
+def _frame_records(frame):
+    """Frame rows as dicts, dropping the cells of enrichments a row doesn't have"""
+    records = []
+    for row in frame.to_dict('records'):
+        records.append({key: value for key, value in row.items()
+                        if not (pd.isna(value) and key not in EXPECTED_RECORDS[0])})
+    return records
+
+
+def test_records_match_contract():
+    result = EnhancedExcelParser().parse_file(SALES_CSV, 'sales.csv')
+    assert result['success']
+    assert result['processed_data'] == EXPECTED_RECORDS
+    assert [list(record) for record in result['processed_data']] == [list(record) for record in EXPECTED_RECORDS]
+
+
+def test_frame_matches_records():
+    result = EnhancedExcelParser().parse_file(SALES_CSV, 'sales.csv', output_format='frame')
+    assert result['success']
+    frame = result['processed_data']
+    assert isinstance(frame, pd.DataFrame)
+    records = _frame_records(frame)
+    # The frame keeps None/NaN for a missing total; compare it separately
+    assert pd.isna(records[1].pop('total_amount'))
+    expected = [dict(record) for record in EXPECTED_RECORDS]
+    del expected[1]['total_amount']
+    assert records == expected
+
+
+def test_failing_row_is_skipped_alone():
+    parser = EnhancedExcelParser()
+    process_item_names = parser._process_item_name_column
+
+    def fail_on_fries(series, pos_system):
+        if 'Fries' in series.tolist():
+            raise ValueError('bad item name')
+        return process_item_names(series, pos_system)
+
+    parser._process_item_name_column = fail_on_fries
+    df = pd.DataFrame({'Date': ['2024-01-05', '2024-01-06', '2024-01-07'],
+                       'Item Name': ['Burger', 'Fries', 'Soda'],
+                       'Quantity': [2, 1, 3], 'Price': [9.5, 3.25, 1.5], 'Total': [19.0, None, 4.5]})
+    pos_analysis = {'pos_system': 'unknown'}
+    column_intelligence = {'mapping': {'date': 'Date', 'item_name': 'Item Name', 'quantity': 'Quantity',
+                                       'unit_price': 'Price', 'total_amount': 'Total'}}
+
+    records, metadata = parser._process_with_intelligence(df, pos_analysis, column_intelligence)
+    assert records == [EXPECTED_RECORDS[0], EXPECTED_RECORDS[2]]
+    assert metadata['records_processed'] == 2
+    assert metadata['records_skipped'] == 1
+
+    frame, metadata = parser._process_with_intelligence(df, pos_analysis, column_intelligence, 'frame')
+    assert frame['item_name'].tolist() == ['Burger', 'Soda']
+    assert metadata['records_skipped'] == 1